@@ -13,25 +13,43 @@ Usage:
 Config: config.yaml (see README)
 """
 import argparse
+import asyncio
+import hashlib
+import html as _html
+import json as _json
 import os
+import pickle
+import re
 import sys
 import smtplib
 import ssl
-import pytz
+import tempfile
 import yaml
 import requests
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta, time
+import aiohttp
+from email.message import EmailMessage
+from datetime import datetime, date, timedelta, time
 from dateutil.tz import gettz
 from dateutil import parser as dtparser
-from collections import defaultdict
-from jinja2 import Template
+from collections import Counter, defaultdict
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from operator import itemgetter
+from zoneinfo import ZoneInfo
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, select_autoescape
 
 from icalendar import Calendar
 import recurring_ical_events
+import x_wr_timezone
+
+try:  # libyaml (C) parser, pokud je PyYAML s ním zkompilované
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
-HTML_TEMPLATE = Template(u"""
+CACHE_DIR = os.path.expanduser("~/.cache/calendar_asistant")
+
+_SRC = u"""
 <!doctype html>
 <html>
   <head>
@@ -53,20 +71,20 @@ HTML_TEMPLATE = Template(u"""
   </head>
   <body>
     <h1>{{ title }}</h1>
-    {% if intro %}<p>{{ intro }}</p>{% endif %}
+    {% if intro %}<p>{{ intro | safe }}</p>{% endif %}
 
     {% if grouped_events %}
       {% for day, items in grouped_events.items() %}
         <h2>{{ day }}</h2>
         {% for ev in items %}
           <div class="event">
-            <div class="title">{{ ev.title | e }}
+            <div class="title">{{ ev.title }}
               {% if ev.is_all_day %}<span class="allday">celý den</span>{% endif %}
             </div>
             <div class="time">
               {% if not ev.is_all_day %}{{ ev.start_str }}–{{ ev.end_str }}{% else %}—{% endif %}
             </div>
-            {% if ev.location %}<div class="loc">{{ ev.location | e }}</div>{% endif %}
+            {% if ev.location %}<div class="loc">{{ ev.location }}</div>{% endif %}
             <div class="cal">{{ ev.calendar_name }}</div>
           </div>
         {% endfor %}
@@ -80,19 +98,105 @@ HTML_TEMPLATE = Template(u"""
     </div>
   </body>
 </html>
-""")
+"""
+
+_ENV = None
+
+def _template_env():
+    """Jedno Environment pro celý běh; zkompilovaný bytecode šablony se drží na disku
+    mezi běhy cronu. Když cache adresář nejde použít, renderuje se bez ní."""
+    global _ENV
+    if _ENV is None:
+        bytecode_cache = None
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            if os.access(CACHE_DIR, os.W_OK):
+                bytecode_cache = FileSystemBytecodeCache(CACHE_DIR)
+        except OSError as e:
+            print(f"[WARN] Template cache disabled: {type(e).__name__}: {e}", file=sys.stderr)
+        _ENV = Environment(
+            loader=DictLoader({"summary.html": _SRC}),
+            autoescape=select_autoescape(default_for_string=True, default=True),
+            auto_reload=False,
+            bytecode_cache=bytecode_cache,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+    return _ENV
 
 # ===== Messaging integrations: Slack only =====
-import json as _json
+USER_AGENT = "calendar-asistant/1"
+
+def _new_session():
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+# každý odesílatel má svou keep-alive session: míří na jiný host (hooks.slack.com
+# vs. slack.com) a běží ve vlastním vlákně, requests.Session není zaručeně thread-safe
+_WEBHOOK_SESSION = _new_session()
+_BOT_SESSION = _new_session()
+
+_BR = re.compile(r"<br\s*/?>", re.I)
+_P = re.compile(r"</p>", re.I)
+_TAG = re.compile(r"<[^>]+>")
+_NL = re.compile(r"\n{3,}")
 
 def html_to_text(html):
-    import re
-    text = re.sub(r"<br\s*/?>", "\n", html, flags=re.I)
-    text = re.sub(r"</p>", "\n\n", text, flags=re.I)
-    text = re.sub(r"<[^>]+>", "", text)
-    return re.sub(r"\n{3,}", "\n\n", text).strip()
+    text = _BR.sub("\n", html)
+    text = _P.sub("\n\n", text)
+    text = _TAG.sub("", text)
+    return _NL.sub("\n\n", text).strip()
+
+def _slack_escape(text):
+    # mrkdwn bere &, < a > jako řídicí znaky
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+_SLACK_SECTION_LIMIT = 3000
+_PARTIAL_ENTITY = re.compile(r"&[a-z]*$")
+
+def _day_blocks(day, items):
+    lines = []
+    for ev in items:
+        when = "celý den" if ev["is_all_day"] else f"{ev['start_str']}–{ev['end_str']}"
+        line = f"*{when}*  {_slack_escape(ev['title'])}"
+        if ev["location"]:
+            line += f"  _{_slack_escape(ev['location'])}_"
+        lines.append(f"{line}  · {_slack_escape(ev['calendar_name'])}")
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": day[:150]}}]
+    # section unese max. 3000 znaků – plný den rozdělíme do více sekcí, vždy na hranici řádku
+    chunk, size = [], 0
+    for line in lines:
+        if len(line) > _SLACK_SECTION_LIMIT:
+            # jediný obří řádek ořízneme, ale nenecháme na konci useknutou &entitu
+            line = _PARTIAL_ENTITY.sub("", line[:_SLACK_SECTION_LIMIT])
+        if chunk and size + 1 + len(line) > _SLACK_SECTION_LIMIT:
+            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(chunk)}})
+            chunk, size = [], 0
+        size += len(line) + (1 if chunk else 0)
+        chunk.append(line)
+    if chunk:
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(chunk)}})
+    return blocks
+
+def build_slack_blocks(title, intro, grouped, tzname):
+    """Build a Block Kit payload straight from grouped events (no HTML round-trip)."""
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": title[:150]}}]
+    if intro:
+        # intro smí obsahovat HTML (viz config), Slack ho neumí
+        text = _slack_escape(_html.unescape(html_to_text(intro)))
+        text = _PARTIAL_ENTITY.sub("", text[:_SLACK_SECTION_LIMIT])
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": text}})
+    if grouped:
+        for day, items in grouped.items():
+            blocks.extend(_day_blocks(day, items))
+    else:
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "Žádné události v daném období."}})
+    blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": f"Časové pásmo: {tzname}"}]})
+    # Slack přijme max. 50 bloků; "text" je fallback pro notifikace
+    return {"text": title, "blocks": blocks[:50]}
 
-def send_slack_webhook(cfg, subject, html_body):
+def send_slack_webhook(cfg, payload):
     slack = cfg.get("slack", {})
     if not slack.get("enabled"):
         return
@@ -100,14 +204,10 @@ def send_slack_webhook(cfg, subject, html_body):
     if not url:
         print("[WARN] Slack webhook enabled but webhook_url missing.", file=sys.stderr)
         return
-    # Slack neumí HTML – převedeme na prostý text
-    text = html_to_text(html_body)
-    payload = {"text": f"*{subject}*\n{text[:38000]}"}
-    r = requests.post(url, data=_json.dumps(payload),
-                      headers={"Content-Type":"application/json"}, timeout=15)
+    r = _WEBHOOK_SESSION.post(url, json=payload, timeout=15)
     r.raise_for_status()
 
-def send_slack_bot(cfg, subject, html_body):
+def send_slack_bot(cfg, payload):
     bot = cfg.get("slack_bot", {})
     if not bot.get("enabled"):
         return
@@ -116,17 +216,20 @@ def send_slack_bot(cfg, subject, html_body):
     if not token or not channel:
         print("[WARN] Slack bot enabled but token/channel_id missing.", file=sys.stderr)
         return
-    text = f"*{subject}*\n" + html_to_text(html_body)
-    r = requests.post("https://slack.com/api/chat.postMessage",
-                      headers={"Authorization": f"Bearer {token}"},
-                      data={"channel": channel, "text": text}, timeout=20)
+    r = _BOT_SESSION.post("https://slack.com/api/chat.postMessage",
+                          headers={"Authorization": f"Bearer {token}"},
+                          json={**payload, "channel": channel}, timeout=20)
     r.raise_for_status()
+    # Web API hlásí odmítnutí (např. invalid_blocks) přes HTTP 200 s "ok": false
+    data = r.json()
+    if not data.get("ok"):
+        raise RuntimeError(f"Slack chat.postMessage failed: {data.get('error', 'unknown error')}")
 
 def load_config(path="config.yaml"):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Missing {path}. Create it from config.example.yaml.")
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
 
 def daterange_window(mode, tz):
     now = datetime.now(tz)
@@ -156,102 +259,277 @@ def safe_str(v):
             return v.decode("latin-1", errors="ignore")
     return str(v)
 
-from datetime import datetime, timedelta, time, date  # ← doplň "date", pokud chybí
+def _ics_cache_paths(url):
+    base = os.path.join(CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest())
+    return base + ".ics", base + ".meta.json"
+
+def _write_atomic(path, data):
+    # unikátní dočasný soubor – stejný klíč může zapisovat víc procesů naráz
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+async def fetch_ics(session, url):
+    """Download an ICS feed into the on-disk cache and return the path of its body.
+
+    Meant to be gathered concurrently for all feeds. The body is streamed to disk
+    in chunks, so the whole feed is never held in memory here; workers read it
+    from the returned path. ETag/Last-Modified are kept next to it, so an
+    unchanged feed answers 304 and the cached file is reused. If the cache can't
+    be written, the body is returned as bytes instead.
+    """
+    body_path, meta_path = _ics_cache_paths(url)
+    meta = {}
+    if os.path.exists(body_path) and os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = _json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with session.get(url, headers=headers, timeout=timeout) as resp:
+        if resp.status == 304 and headers:
+            return body_path
+        resp.raise_for_status()
+        meta = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+        # cache je jen optimalizace – když nejde zapsat, bereme tělo do paměti
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # unikátní dočasný soubor – stejná URL může být v configu víckrát a stahuje se souběžně
+            fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".part")
+        except OSError as e:
+            print(f"[WARN] ICS cache not writable, keeping {url} in memory: {type(e).__name__}: {e}", file=sys.stderr)
+            return await resp.read()
+        write_error = None
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in resp.content.iter_chunked(64 * 1024):
+                    try:
+                        f.write(chunk)
+                    except OSError as e:
+                        write_error = e
+                        break
+        except OSError as e:  # selhání při zavírání (flush) souboru
+            write_error = e
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    if write_error is not None:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        print(f"[WARN] Could not cache {url}, downloading it again into memory: "
+              f"{type(write_error).__name__}: {write_error}", file=sys.stderr)
+        # část těla už je ze streamu pryč – stáhni znovu celé, bez podmíněných hlaviček
+        async with session.get(url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            return await resp.read()
 
-def parse_ics(url, tz, calendar_name):
-    """Fetch an ICS and expand occurrences into normalized events in target TZ."""
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-    cal = Calendar.from_ical(resp.content)
+    try:
+        os.replace(tmp, body_path)
+    except OSError as e:
+        print(f"[WARN] Could not cache {url}: {type(e).__name__}: {e}", file=sys.stderr)
+        with open(tmp, "rb") as f:
+            body = f.read()
+        os.unlink(tmp)
+        return body
+    try:
+        _write_atomic(meta_path, _json.dumps(meta).encode("utf-8"))
+    except OSError as e:
+        # bez metadat se příště jen stáhne celé tělo znovu
+        print(f"[WARN] Could not write ICS cache metadata {meta_path}: {type(e).__name__}: {e}", file=sys.stderr)
+    return body_path
 
-    events = []
+EVENTS_CACHE_VERSION = 5  # zvyš při změně tvaru normalizovaných událostí
+EVENTS_CACHE_MAX_AGE_DAYS = 14  # okno se mění každý den, starší pickly už nikdo nepřečte
 
-    # --- kompatibilní expand (starší i novější verze recurring-ical-events) ---
-    start_utc = datetime(1970, 1, 1, tzinfo=pytz.UTC)
-    end_utc   = datetime(2100, 1, 1, tzinfo=pytz.UTC)
+def _prune_event_cache(directory):
+    cutoff = datetime.now().timestamp() - EVENTS_CACHE_MAX_AGE_DAYS * 86400
     try:
-        comps = recurring_ical_events.of(cal).between(start_utc, end_utc, include=True)
-    except TypeError:
-        comps = recurring_ical_events.of(cal).between(start_utc, end_utc)
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name.endswith(".pkl") and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass  # mezitím smazal jiný worker, nebo nejde mazat – nevadí
+
+def parse_ics_file(source, tzname, calendar_name, start, end):
+    """Worker entry point: take what fetch_ics returned (cache path, or bytes if
+    the cache was unusable) and hand the body to parse_ics_bytes."""
+    if isinstance(source, bytes):
+        content = source
+    else:
+        with open(source, "rb") as f:
+            content = f.read()
+    return parse_ics_bytes(content, tzname, calendar_name, start, end)
 
-    for component in comps:
-        if component.name != "VEVENT":
-            continue
+def parse_ics_bytes(content, tzname, calendar_name, start, end):
+    """Like _expand_events, but reuses the pickled result when the ICS body and window are unchanged.
+
+    Runs in a worker process, so the zone comes in by name and is rebuilt here.
+    """
+    h = hashlib.sha1(content)
+    for part in (EVENTS_CACHE_VERSION, calendar_name, tzname, start.isoformat(), end.isoformat()):
+        h.update(b"\0" + str(part).encode("utf-8"))
+    path = os.path.join(CACHE_DIR, "events", h.hexdigest() + ".pkl")
+
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"[WARN] Ignoring broken event cache {path}: {e}", file=sys.stderr)
+
+    events = _expand_events(content, ZoneInfo(tzname), calendar_name, start, end)
+    # cache je jen optimalizace – chyba zápisu nesmí shodit jinak úspěšně načtený kalendář
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, pickle.dumps(events, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError as e:
+        print(f"[WARN] Could not write event cache {path}: {type(e).__name__}: {e}", file=sys.stderr)
+    else:
+        _prune_event_cache(os.path.dirname(path))
+    return events
+
+_RECURRENCE_PROPS = ("RRULE", "RDATE", "EXDATE", "RECURRENCE-ID")
 
-        summary  = safe_str(component.get("SUMMARY"))
-        location = safe_str(component.get("LOCATION"))
-        dtstart  = component.get("DTSTART").dt
-        dtend    = component.get("DTEND").dt if component.get("DTEND") else None
+def _in_window(ev_start, ev_end, start, end):
+    """Same overlap rule as recurring_ical_events: zero-length events count at their start."""
+    if ev_start == ev_end:
+        return start <= ev_start < end
+    return ev_start < end and start < ev_end
+
+def _expand_events(content, tz, calendar_name, start, end):
+    """Expand occurrences of a fetched ICS body within [start, end] into normalized events in target TZ."""
+    cal = Calendar.from_ical(content)
+    # X-WR-TIMEZONE (Google) jen na celém kalendáři – dílčí kalendář pro expander ho nemá,
+    # takže ho převedeme dřív, než události rozdělíme (expander to jinak dělá sám)
+    cal = x_wr_timezone.to_standard(cal)
+
+    events = []
+
+    # jednorázové události nemusí přes expander; série (včetně upravených výskytů
+    # se stejným UID) a UID, které se ve feedu opakuje (znovu publikovaná událost –
+    # expander z ní nechá jen nejvyšší SEQUENCE), ano
+    vevents = cal.walk("VEVENT")
+    uid_counts = Counter(c.get("UID") for c in vevents)
+    recurring_uids = {uid for uid, n in uid_counts.items() if n > 1}
+    recurring_uids.update(c.get("UID") for c in vevents
+                          if any(prop in c for prop in _RECURRENCE_PROPS))
+    simple = []
+    recurring = Calendar()
+    for c in vevents:
+        if c.get("UID") in recurring_uids or any(prop in c for prop in _RECURRENCE_PROPS):
+            recurring.add_component(c)
+        else:
+            simple.append(c)
+
+    # --- kompatibilní expand (starší i novější verze recurring-ical-events) ---
+    # rozbaluj jen okno, které se opravdu vypisuje – nekonečná RRULE jinak generuje desetiletí výskytů
+    # expander dostává jen VEVENTy a vrací jen VEVENTy – filtr podle jména ve smyčce už není potřeba
+    comps = []
+    if recurring.subcomponents:
+        expander = recurring_ical_events.of(recurring, components=["VEVENT"])
+        try:
+            comps = expander.between(start, end, include=True)
+        except TypeError:
+            comps = expander.between(start, end)
+
+    # konstanty a metody vytažené před smyčku – jsou to pak rychlé lokální proměnné
+    combine = datetime.combine
+    midnight = time.min
+    one_day = timedelta(days=1)
+    one_hour = timedelta(hours=1)
+
+    for component in chain(simple, comps):
+        get = component.get
+        summary    = safe_str(get("SUMMARY"))
+        location   = safe_str(get("LOCATION"))
+        dtstart    = get("DTSTART").dt
+        dtend_prop = get("DTEND")
+        if dtend_prop is not None:
+            dtend = dtend_prop.dt
+        else:
+            # expander DTEND vždy doplní; u jednorázových to uděláme stejně jako on
+            duration = get("DURATION")
+            dtend = dtstart + duration.dt if duration is not None else dtstart
 
         # --- all-day (VALUE=DATE) vs. datetimes, "floating time" → cílová TZ ---
         if isinstance(dtstart, date) and not isinstance(dtstart, datetime):
             # celodenní: ber půlnoc v cílovém pásmu; Google typicky dává DTEND = další den
-            start_dt = tz.localize(datetime.combine(dtstart, time.min))
+            start_dt = combine(dtstart, midnight).replace(tzinfo=tz)
             if dtend and isinstance(dtend, date) and not isinstance(dtend, datetime):
-                end_dt = tz.localize(datetime.combine(dtend, time.min))
+                end_dt = combine(dtend, midnight).replace(tzinfo=tz)
             else:
-                end_dt = start_dt + timedelta(days=1)
+                end_dt = start_dt + one_day
             is_all_day = True
         else:
             # má čas; pokud chybí tzinfo, ber jako „floating“ v cílové TZ
             if isinstance(dtstart, datetime):
-                start_dt = dtstart if dtstart.tzinfo else tz.localize(dtstart)
+                start_dt = dtstart if dtstart.tzinfo else dtstart.replace(tzinfo=tz)
             else:
-                start_dt = tz.localize(datetime.combine(dtstart, time.min))
+                start_dt = combine(dtstart, midnight).replace(tzinfo=tz)
 
             if dtend:
                 if isinstance(dtend, datetime):
-                    end_dt = dtend if dtend.tzinfo else tz.localize(dtend)
+                    end_dt = dtend if dtend.tzinfo else dtend.replace(tzinfo=tz)
                 else:
-                    end_dt = tz.localize(datetime.combine(dtend, time.min))
+                    end_dt = combine(dtend, midnight).replace(tzinfo=tz)
             else:
-                end_dt = start_dt + timedelta(hours=1)
+                end_dt = start_dt + one_hour
 
-            # sjednoť do cílové TZ
-            start_dt = start_dt.astimezone(tz)
-            end_dt   = end_dt.astimezone(tz)
+            # sjednoť do cílové TZ (floating časy už ji mají – ZoneInfo je singleton, stačí `is`)
+            if start_dt.tzinfo is not tz:
+                start_dt = start_dt.astimezone(tz)
+            if end_dt.tzinfo is not tz:
+                end_dt = end_dt.astimezone(tz)
             is_all_day = False
 
+        if not _in_window(start_dt, end_dt, start, end):
+            continue
+
         events.append({
             "title": summary or "(Bez názvu)",
             "start": start_dt,
             "end":   end_dt,
             "is_all_day": is_all_day,
             "location": location or "",
-            "calendar_name": calendar_name
+            "calendar_name": calendar_name,
+            # formátování hned tady, ať render už jen vypisuje
+            "day_label": start_dt.strftime("%A %d.%m.%Y"),
+            "start_str": start_dt.strftime("%H:%M"),
+            "end_str": end_dt.strftime("%H:%M"),
         })
 
     return events
 
 
-def within_range(ev, start, end):
-    return not (ev["end"] <= start or ev["start"] >= end)
-
 def dedupe_and_sort(events):
-    keyset = set()
-    out = []
+    seen = {}
     for ev in events:
-        k = (ev["title"], ev["start"], ev["end"], ev["calendar_name"])
-        if k in keyset:
-            continue
-        keyset.add(k)
-        out.append(ev)
-    out.sort(key=lambda e: (e["start"], e["title"]))
-    return out
+        seen.setdefault((ev["title"], ev["start"], ev["end"], ev["calendar_name"]), ev)
+    return sorted(seen.values(), key=itemgetter("start", "title"))
 
 def group_by_day(events, tz):
     grouped = defaultdict(list)
     for ev in events:
-        day_label = ev["start"].strftime("%A %d.%m.%Y")
-        item = {
-            "title": ev["title"],
-            "start_str": ev["start"].strftime("%H:%M"),
-            "end_str": ev["end"].strftime("%H:%M"),
-            "is_all_day": ev["is_all_day"],
-            "location": ev["location"],
-            "calendar_name": ev["calendar_name"]
-        }
-        grouped[day_label].append(item)
+        grouped[ev["day_label"]].append(ev)
     return grouped
 
 def send_email(cfg, subject, html_body):
@@ -259,11 +537,12 @@ def send_email(cfg, subject, html_body):
     sender = smtp["from"]
     to_list = smtp["to"] if isinstance(smtp["to"], list) else [smtp["to"]]
 
-    msg = MIMEMultipart("alternative")
+    # jediná HTML část – multipart obálka by jen přidávala hranice a hlavičky
+    msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = sender
     msg["To"] = ", ".join(to_list)
-    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    msg.set_content(html_body, subtype="html", charset="utf-8")
 
     context = ssl.create_default_context()
     server = smtp.get("server", "smtp.gmail.com")
@@ -277,7 +556,7 @@ def send_email(cfg, subject, html_body):
             s.starttls(context=context)
         if username and password:
             s.login(username, password)
-        s.sendmail(sender, to_list, msg.as_string())
+        s.send_message(msg)
 
 def main():
     parser = argparse.ArgumentParser()
@@ -287,28 +566,45 @@ def main():
 
     cfg = load_config(args.config)
     tzname = cfg.get("time_zone", "Europe/Prague")
-    tz = pytz.timezone(tzname)
+    tz = ZoneInfo(tzname)
 
     start, end, title = daterange_window(args.mode, tz)
 
-    events = []
+    calendars = []
     for cal in cfg.get("calendars", []):
-        name = cal["name"]
         if "ics_url" not in cal:
-            print(f"Skipping {name}: missing ics_url", file=sys.stderr)
+            print(f"Skipping {cal['name']}: missing ics_url", file=sys.stderr)
             continue
-        try:
-            evs = parse_ics(cal["ics_url"], tz, name)
-            evs = [e for e in evs if within_range(e, start, end)]
-            events.extend(evs)
-        except Exception as e:
-            print(f"[WARN] Calendar '{name}' failed: {e}", file=sys.stderr)
+        calendars.append(cal)
+
+    # stahuj všechny feedy souběžně, parsování pak běží v samostatných procesech (mimo GIL)
+    async def run():
+        async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}, trust_env=True) as session:
+            return await asyncio.gather(
+                *[fetch_ics(session, cal["ics_url"]) for cal in calendars],
+                return_exceptions=True)
+
+    sources = asyncio.run(run()) if calendars else []
+
+    events = []
+    with ProcessPoolExecutor(max_workers=max(1, min(len(calendars), os.cpu_count() or 1))) as pool:
+        futs = []
+        for cal, source in zip(calendars, sources):
+            if isinstance(source, BaseException):
+                print(f"[WARN] Calendar '{cal['name']}' failed: {type(source).__name__}: {source}", file=sys.stderr)
+                continue
+            futs.append((cal["name"], pool.submit(parse_ics_file, source, tzname, cal["name"], start, end)))
+        for name, fut in futs:
+            try:
+                events.extend(fut.result())
+            except Exception as e:
+                print(f"[WARN] Calendar '{name}' failed: {type(e).__name__}: {e}", file=sys.stderr)
 
     events = dedupe_and_sort(events)
     grouped = group_by_day(events, tz)
 
     intro = cfg.get("intro_text_daily" if args.mode=="daily" else "intro_text_weekly", "")
-    html = HTML_TEMPLATE.render(
+    html = _template_env().get_template("summary.html").render(
         title=title,
         intro=intro,
         grouped_events=grouped,
@@ -322,10 +618,16 @@ def main():
         print(f"[DRY RUN] Wrote {out}")
         return
 
-    # Send email + Slack
-    send_email(cfg, subject=title, html_body=html)
-    send_slack_webhook(cfg, subject=title, html_body=html)
-    send_slack_bot(cfg, subject=title, html_body=html)
+    # Slack neumí HTML – zprávu skládáme rovnou z událostí, HTML je jen pro e-mail
+    slack_payload = build_slack_blocks(title, intro, grouped, tzname)
+
+    # Send email + Slack – každá služba blokuje na jiném serveru, tak běží souběžně
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        futs = [ex.submit(send_email, cfg, subject=title, html_body=html),
+                ex.submit(send_slack_webhook, cfg, slack_payload),
+                ex.submit(send_slack_bot, cfg, slack_payload)]
+        for f in as_completed(futs):
+            f.result()
     print("Notifications sent.")
 
 if __name__ == "__main__":